@@ -1,65 +1,18 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from collections import OrderedDict, namedtuple
 from cjkradlib import RadicalFinder
 import opencc
-from .interfaces import CharacterInfo, Form, Composition
+from .interfaces import CharacterInfo, Form, Composition, VariantCluster, VariantMember
+from .convert import CONVERTER_CONFIGS, load_converter
+from .variants import VariantIndex, build_variant_index
+from . import data
+from .data import DataSnapshot
 import os
-import json
-
-
-# Load Unihan kDefinition JSON into module-level cache on import
-_kdef_cache = {}
-_cjk_learn_cache = {}
-
-base = os.path.dirname(__file__)
-data_dir = os.path.normpath(os.path.join(base, os.pardir, "data"))
-json_path = os.path.join(data_dir, "kDefinition.json")
-cjk_json_path = os.path.join(data_dir, "CJK_learn.json")
-
-# Load Unihan kDefinition (map form expected)
-try:
-	if os.path.exists(json_path):
-		with open(json_path, "r", encoding="utf-8") as fh:
-			data = json.load(fh)
-			if isinstance(data, dict):
-				for ch, val in data.items():
-					definition = None
-					if isinstance(val, dict):
-						definition = val.get("definition")
-					elif isinstance(val, str):
-						definition = val
-					if isinstance(ch, str) and isinstance(definition, str):
-						_kdef_cache[ch] = definition
-except Exception:
-	# any parse/read error -> keep cache empty
-	_kdef_cache = {}
-
-# Load CJK_learn (map form expected)
-try:
-	if os.path.exists(cjk_json_path):
-		with open(cjk_json_path, "r", encoding="utf-8") as fh:
-			cdata = json.load(fh)
-			if isinstance(cdata, dict):
-				for ch, val in cdata.items():
-					if isinstance(ch, str) and isinstance(val, dict):
-						_cjk_learn_cache[ch] = {
-							"keyword_rtk": val.get("keyword_rtk"),
-							"keyword_rth": val.get("keyword_rth"),
-							"keyword_rsh": val.get("keyword_rsh"),
-							"index_hanja": val.get("index_hanja"),
-							"index_rtk": val.get("index_rtk"),
-							"index_rth": val.get("index_rth"),
-							"index_rsh": val.get("index_rsh"),
-						}
-except Exception:
-	_cjk_learn_cache = {}
-
-
-def _load_converter(name: str) -> Optional[opencc.OpenCC]:
-	"""Try to load an OpenCC converter by config name, return None if not available."""
-	try:
-		return opencc.OpenCC(name)
-	except Exception:
-		return None
+import threading
+
+
+# Max number of get_info results kept in memory (0 disables the cache)
+INFO_CACHE_SIZE = int(os.environ.get("INFO_CACHE_SIZE", "20000"))
 
 
 def _safe_convert(conv: Optional[opencc.OpenCC], text: str) -> str:
@@ -72,49 +25,109 @@ def _safe_convert(conv: Optional[opencc.OpenCC], text: str) -> str:
 		return text
 
 
+_finders = {}
+_finders_lock = threading.Lock()
+
+
+def _load_finder(lang: str) -> RadicalFinder:
+	"""Return the shared RadicalFinder for lang ('jp' or 'zh'); building one is slow."""
+	finder = _finders.get(lang)
+	if finder is None:
+		# Locked so concurrent cold requests build each finder only once
+		with _finders_lock:
+			finder = _finders.get(lang)
+			if finder is None:
+				finder = _finders[lang] = RadicalFinder(lang=lang)
+	return finder
+
+
+_variant_index = None  # (snapshot, index) for the data version it was built from
+_variant_index_lock = threading.Lock()
+
+
+def _build_variant_index(snap: DataSnapshot) -> VariantIndex:
+	"""Build the variant cluster index for snap (slow: ~1s, plus the finder on first use)."""
+	converters = {}
+	for key, names in CONVERTER_CONFIGS.items():
+		conv = next((c for c in map(load_converter, names) if c is not None), None)
+		if conv is not None:
+			converters[key] = conv.convert
+	# Both finders share the same Unihan variant table
+	entries = _load_finder("jp").params["variant"].entries
+	return build_variant_index(entries, converters, extra_chars=set(snap.kdef) | set(snap.cjk_learn))
+
+
+def refresh_variant_index(snap: Optional[DataSnapshot] = None) -> VariantIndex:
+	"""Build and publish the variant index for snap (default: current data) unless already published.
+
+	Called off the request path: at startup and from a data.on_change listener,
+	so lookups find the index ready. Concurrent callers wait for one build.
+	"""
+	snap = snap or data.current()
+	with _variant_index_lock:
+		global _variant_index
+		built = _variant_index
+		if built is not None and built[0] is snap:
+			return built[1]
+		index = _build_variant_index(snap)
+		# Only ever move forward: a request still holding an older snapshot builds but does not publish
+		if built is None or snap.version >= built[0].version:
+			_variant_index = (snap, index)
+		return index
+
+
+def _load_variant_index(snap: Optional[DataSnapshot] = None) -> VariantIndex:
+	"""Return the published variant index for snap, building it only if it is not ready yet."""
+	snap = snap or data.current()
+	built = _variant_index
+	if built is not None and built[0] is snap:
+		return built[1]
+	return refresh_variant_index(snap)
+
+
+def get_variant_cluster(char: str) -> VariantCluster:
+	"""Return every character linked to char (variants and S/T/J forms, transitively) with its script roles."""
+	if not isinstance(char, str) or len(char) != 1:
+		raise ValueError("char must be a single character")
+	index = _load_variant_index()
+	return VariantCluster(
+		char=char,
+		cluster_id=index.cluster_id(char),
+		members=[VariantMember(char=m, roles=list(roles)) for m, roles in index.members(char)],
+	)
+
+
 def _same(a: str, b: str) -> bool:
 	"""Return True if two strings are identical (and non-empty)."""
 	return isinstance(a, str) and isinstance(b, str) and a == b and len(a) > 0
 
 
-def get_info(char: str, input_lang: str = "auto", output_format: Optional[str] = None) -> CharacterInfo:
-	"""
-	Get character info for a single CJK character and return a CharacterInfo instance.
-	"""
+def _detect_forms(char: str, input_lang: str, convert=_safe_convert) -> Tuple[str, str, str, str]:
+	"""Detect the script of char and derive its forms.
 
-	if not isinstance(char, str) or len(char) == 0:
-		raise ValueError("char must be a non-empty string")
+	Returns (detected_input_lang, simplified, traditional, japanese). `convert`
+	has the signature of _safe_convert, so callers can serve conversions from a memo.
+	"""
 
 	# Load converters if available
-	converter_s2t = _load_converter("s2t.json")  # Simplified -> Traditional
-	converter_t2s = _load_converter("t2s.json")  # Traditional -> Simplified
-	converter_t2jp = _load_converter("t2jp.json")  # Traditional -> Japanese
+	converter_s2t = load_converter("s2t.json")  # Simplified -> Traditional
+	converter_t2s = load_converter("t2s.json")  # Traditional -> Simplified
+	converter_t2jp = load_converter("t2jp.json")  # Traditional -> Japanese
 	# try common jp->t names if available
-	converter_jp2t = _load_converter("jp2t.json") or _load_converter("j2t.json")
-
-	# RadicalFinder lookups (JP and ZH)
-	finderJP = RadicalFinder(lang="jp")
-	finderZH = RadicalFinder(lang="zh")
-	resultJP = finderJP.search(char)
-	resultZH = finderZH.search(char)
-
-	# Merge composition-related sets from both finders
-	compositions = set(resultJP.compositions) | set(resultZH.compositions)
-	supercompositions = set(resultJP.supercompositions) | set(resultZH.supercompositions)
-	variants = set(resultJP.variants) | set(resultZH.variants)
+	converter_jp2t = load_converter("jp2t.json") or load_converter("j2t.json")
 
 	# Attempt to detect input language when requested
 	detected = input_lang
 	# Precompute some conversions for detection
-	s2t_char = _safe_convert(converter_s2t, char)
-	t2s_char = _safe_convert(converter_t2s, char)
+	s2t_char = convert(converter_s2t, char)
+	t2s_char = convert(converter_t2s, char)
 
 	# Helper to check if this char could be produced by converting a traditional char via t2jp
 	def _is_japanese_candidate(candidate_trad: str) -> bool:
 		if converter_t2jp is None:
 			return False
 		try:
-			return _safe_convert(converter_t2jp, candidate_trad) == char
+			return convert(converter_t2jp, candidate_trad) == char
 		except Exception:
 			return False
 
@@ -149,37 +162,175 @@ def get_info(char: str, input_lang: str = "auto", output_format: Optional[str] =
 
 	if detected == "sc":
 		simplified = char
-		traditional = _safe_convert(converter_s2t, simplified)
-		japanese = _safe_convert(converter_t2jp, traditional)
+		traditional = convert(converter_s2t, simplified)
+		japanese = convert(converter_t2jp, traditional)
 
 	elif detected == "tc":
 		traditional = char
-		simplified = _safe_convert(converter_t2s, traditional)
-		japanese = _safe_convert(converter_t2jp, traditional)
+		simplified = convert(converter_t2s, traditional)
+		japanese = convert(converter_t2jp, traditional)
 
 	else:  # detected == 'jp'
 		japanese = char
 		# prefer explicit jp->t converter if available
 		if converter_jp2t is not None:
-			traditional = _safe_convert(converter_jp2t, japanese)
+			traditional = convert(converter_jp2t, japanese)
 		else:
 			# try to find a traditional candidate that maps to this japanese using t2jp
 			found = None
 			if converter_t2jp is not None:
 				# check some likely candidates: original char, s2t(char), t2s(char)
 				for cand in {char, s2t_char, t2s_char}:
-					if _safe_convert(converter_t2jp, cand) == japanese:
+					if convert(converter_t2jp, cand) == japanese:
 						found = cand
 						break
 				traditional = found if found is not None else s2t_char
 		# from traditional compute simplified
-		simplified = _safe_convert(converter_t2s, traditional)
+		simplified = convert(converter_t2s, traditional)
 
 	# Ensure no None values remain: fallback to char as best-effort
 	simplified = simplified or char
 	traditional = traditional or char
 	japanese = japanese or char
 
+	return detected, simplified, traditional, japanese
+
+
+def get_forms_batch(chars: List[str], input_lang: str = "auto") -> List[Tuple[str, str, str, str]]:
+	"""Like the form detection of get_info, for many single characters at once.
+
+	Each converter runs once over the whole batch (chars joined by newlines, which
+	no OpenCC phrase spans); returns one (detected, simplified, traditional, japanese)
+	tuple per char, in order.
+	"""
+	memo = {}
+	names = [n for group in CONVERTER_CONFIGS.values() for n in group]
+	for conv in {c for c in map(load_converter, names) if c is not None}:
+		out = _safe_convert(conv, "\n".join(chars)).split("\n")
+		if len(out) == len(chars):
+			memo.update(((conv, c), o) for c, o in zip(chars, out))
+
+	def convert(conv: Optional[opencc.OpenCC], text: str) -> str:
+		if conv is None:
+			return text
+		hit = memo.get((conv, text))
+		return hit if hit is not None else _safe_convert(conv, text)
+
+	return [_detect_forms(c, input_lang, convert) for c in chars]
+
+
+def get_info(char: str, input_lang: str = "auto", output_format: Optional[str] = None) -> CharacterInfo:
+	"""
+	Get character info for a single CJK character and return a CharacterInfo instance.
+
+	Results are memoized per (char, input_lang) for the current data version;
+	callers must treat them as read-only.
+	"""
+
+	if not isinstance(char, str) or len(char) == 0:
+		raise ValueError("char must be a non-empty string")
+
+	snap = data.current()
+	key = (char, input_lang)
+	ci = _info_cache.get(key, snap)
+	if ci is None:
+		ci = _compute_info(char, input_lang, snap)
+		_info_cache.put(key, snap, ci)
+	return ci
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _InfoCache:
+	"""LRU of get_info results, holding entries of the current data snapshot only.
+
+	A result computed from a snapshot that is no longer current is returned but
+	not stored, so a request racing a reload cannot re-insert old data (and pin
+	the old snapshot) after the reload cleared the cache.
+	"""
+
+	def __init__(self, maxsize: int) -> None:
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self._snap: Optional[DataSnapshot] = None
+		self._entries: "OrderedDict[Tuple[str, str], CharacterInfo]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: Tuple[str, str], snap: DataSnapshot) -> Optional[CharacterInfo]:
+		with self._lock:
+			ci = self._entries.get(key) if snap is self._snap else None
+			if ci is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+				self._entries.move_to_end(key)
+			return ci
+
+	def put(self, key: Tuple[str, str], snap: DataSnapshot, ci: CharacterInfo) -> None:
+		with self._lock:
+			# Reloads swap the snapshot before clearing, so this check under the lock is race-free
+			if self.maxsize <= 0 or snap is not data.current():
+				return
+			if snap is not self._snap:
+				self._entries.clear()
+				self._snap = snap
+			self._entries[key] = ci
+			self._entries.move_to_end(key)
+			if len(self._entries) > self.maxsize:
+				self._entries.popitem(last=False)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._snap = None
+
+	def info(self) -> CacheInfo:
+		with self._lock:
+			return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+_info_cache = _InfoCache(INFO_CACHE_SIZE)
+
+
+def cache_info() -> CacheInfo:
+	"""Expose hit/miss statistics of the get_info result cache."""
+	return _info_cache.info()
+
+
+def cache_clear() -> None:
+	"""Drop every cached get_info result."""
+	_info_cache.clear()
+
+
+# New data version: drop results built from the old one
+data.on_change(lambda _snap: cache_clear())
+# Then rebuild the variant index in the reloading (watcher) thread rather than in the next request
+data.on_change(refresh_variant_index)
+
+
+def _compute_info(char: str, input_lang: str, snap: DataSnapshot) -> CharacterInfo:
+	"""Uncached body of get_info, reading data files only through snap."""
+
+	# RadicalFinder lookups (JP and ZH)
+	finderJP = _load_finder("jp")
+	finderZH = _load_finder("zh")
+	resultJP = finderJP.search(char)
+	resultZH = finderZH.search(char)
+
+	# Merge composition-related sets from both finders
+	compositions = set(resultJP.compositions) | set(resultZH.compositions)
+	supercompositions = set(resultJP.supercompositions) | set(resultZH.supercompositions)
+	# Variants come precomputed from the cluster index (same Unihan table as both finders).
+	# Direct variants do not depend on the data files, so while a reload rebuilds
+	# the index the previous one serves them without waiting.
+	built = _variant_index
+	index = built[1] if built is not None else _load_variant_index(snap)
+	variants = set(index.variants_of(char))
+
+	detected, simplified, traditional, japanese = _detect_forms(char, input_lang)
+
 	# Clean up variants (remove exact script forms)
 	variants.discard(japanese)
 	variants.discard(simplified)
@@ -195,8 +346,8 @@ def get_info(char: str, input_lang: str = "auto", output_format: Optional[str] =
 		merged_supercompositions=sorted(supercompositions),
 	)
 
-	unihan_def = _kdef_cache.get(char)
-	cjk_learn = _cjk_learn_cache.get(char)
+	unihan_def = snap.kdef.get(char)
+	cjk_learn = snap.cjk_learn.get(char)
 
 	ci = CharacterInfo(
 		char=char,
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import opencc
+
+
+# Converter key -> OpenCC config names to try, in order (same configs get_info uses)
+CONVERTER_CONFIGS: Dict[str, Tuple[str, ...]] = {
+    "s2t": ("s2t.json",),
+    "t2s": ("t2s.json",),
+    "t2jp": ("t2jp.json",),
+    "jp2t": ("jp2t.json", "j2t.json"),
+}
+
+# (source, target) script -> converter keys applied in order; Japanese goes through Traditional
+CONVERSION_STEPS: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    ("sc", "tc"): ("s2t",),
+    ("tc", "sc"): ("t2s",),
+    ("tc", "jp"): ("t2jp",),
+    ("jp", "tc"): ("jp2t",),
+    ("sc", "jp"): ("s2t", "t2jp"),
+    ("jp", "sc"): ("jp2t", "t2s"),
+}
+
+SCRIPTS = ("sc", "tc", "jp")
+
+# Target chunk size in characters; chunks end on a safe boundary at or before it
+CONVERT_CHUNK_CHARS = int(os.environ.get("CONVERT_CHUNK_CHARS", "16384"))
+
+# OpenCC dictionary phrases never contain whitespace or punctuation, so cutting
+# right after one of these cannot split a phrase match.
+_BOUNDARIES = frozenset(
+    "\n\r\t 　"
+    "。，、！？；：「」『』（）《》〈〉【】〔〕…—・～"
+    ".,!?;:()[]{}<>\"'/\\|-"
+)
+
+
+def conversion_steps(source: str, target: str) -> Tuple[str, ...]:
+    """Return the converter keys turning source script text into target script text.
+
+    - source/target: 'sc' | 'tc' | 'jp'
+    """
+    if source not in SCRIPTS or target not in SCRIPTS:
+        raise ValueError(f"Invalid script. Expected one of {list(SCRIPTS)}")
+    if source == target:
+        return ()
+    return CONVERSION_STEPS[(source, target)]
+
+
+# OpenCC converters are shared process-wide, by get_info, the variant index and
+# /api/convert alike. Sharing is safe: the binding holds the GIL for the whole
+# convert() call, so calls on one instance never overlap. For the same reason
+# extra instances buy no parallelism (4 threads on 4 instances are no faster
+# than on 1) and would only reload the dictionaries.
+@lru_cache(maxsize=None)
+def load_converter(name: str) -> Optional[opencc.OpenCC]:
+    """Load an OpenCC converter by config name once per process; None if not available."""
+    try:
+        return opencc.OpenCC(name)
+    except Exception:
+        return None
+
+
+def get_converter(key: str) -> opencc.OpenCC:
+    """Return the shared converter for a CONVERTER_CONFIGS key (first config that loads)."""
+    names = CONVERTER_CONFIGS[key]
+    conv = next((c for c in map(load_converter, names) if c is not None), None)
+    if conv is None:
+        raise RuntimeError(f"OpenCC config not available: {', '.join(names)}")
+    return conv
+
+
+def convert_text(text: str, steps: Tuple[str, ...]) -> str:
+    """Run text through each converter step."""
+    for key in steps:
+        text = get_converter(key).convert(text)
+    return text
+
+
+def _safe_cut(text: str, limit: int) -> int:
+    """Index to cut text at: just after the last boundary in text[:limit], else limit."""
+    floor = limit // 2
+    for i in range(min(limit, len(text)) - 1, floor - 1, -1):
+        if text[i] in _BOUNDARIES:
+            return i + 1
+    # No boundary in the upper half: a hard cut may split a phrase, keep chunks bounded anyway
+    return limit
+
+
+class ChunkSplitter:
+    """Incrementally split a text stream into chunks ending on safe boundaries.
+
+    At most `limit` plus one fed piece of text is buffered at any time.
+    """
+
+    def __init__(self, limit: int = CONVERT_CHUNK_CHARS) -> None:
+        self.limit = max(1, limit)
+        self._buf = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buf += text
+        out: List[str] = []
+        while len(self._buf) >= self.limit:
+            cut = _safe_cut(self._buf, self.limit)
+            out.append(self._buf[:cut])
+            self._buf = self._buf[cut:]
+        return out
+
+    def flush(self) -> str:
+        rest, self._buf = self._buf, ""
+        return rest
+
+
+__all__ = [
+    "CONVERTER_CONFIGS",
+    "ChunkSplitter",
+    "conversion_steps",
+    "convert_text",
+    "get_converter",
+    "load_converter",
+]
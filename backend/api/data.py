@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+base = os.path.dirname(__file__)
+data_dir = os.path.normpath(os.path.join(base, os.pardir, "data"))
+kdef_path = os.path.join(data_dir, "kDefinition.json")
+cjk_learn_path = os.path.join(data_dir, "CJK_learn.json")
+lists_path = os.path.join(data_dir, "lists.json")
+
+# Seconds between two checks of the data files (0 disables the watcher)
+DATA_WATCH_INTERVAL = float(os.environ.get("DATA_WATCH_INTERVAL", "5"))
+
+
+@dataclass(frozen=True, eq=False)
+class DataSnapshot:
+    """One consistent, read-only version of every data file.
+
+    Lookups take a snapshot once and read only from it, so a reload that swaps
+    in a new version never mixes files from two versions within one request.
+    Frozen all the way down (mapping proxies and tuples), so values can be handed
+    out and cached without copies. Snapshots hash by identity and can key caches.
+    """
+    version: int
+    tag: str
+    loaded_at: float
+    kdef: Mapping[str, str] = field(repr=False)
+    cjk_learn: Mapping[str, Mapping[str, Any]] = field(repr=False)
+    lists: Optional[Mapping[str, Any]] = field(repr=False)
+
+    def to_dict(self) -> dict:
+        return {"version": self.version, "tag": self.tag, "loaded_at": self.loaded_at}
+
+
+def _read(path: str) -> Tuple[Optional[Any], str]:
+    """Return (parsed JSON or None if missing, content digest)."""
+    if not os.path.exists(path):
+        return None, "-"
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    return json.loads(raw.decode("utf-8")), hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def _freeze(value: Any) -> Any:
+    """Deep read-only copy of parsed JSON: dicts become mapping proxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _parse_kdef(data: Any) -> Dict[str, str]:
+    if not isinstance(data, dict):
+        raise ValueError("kDefinition.json malformed: expected top-level object")
+    out: Dict[str, str] = {}
+    for ch, val in data.items():
+        definition = None
+        if isinstance(val, dict):
+            definition = val.get("definition")
+        elif isinstance(val, str):
+            definition = val
+        if isinstance(ch, str) and isinstance(definition, str):
+            out[ch] = definition
+    return out
+
+
+def _parse_cjk_learn(data: Any) -> Dict[str, Mapping[str, Any]]:
+    if not isinstance(data, dict):
+        raise ValueError("CJK_learn.json malformed: expected top-level object")
+    out: Dict[str, Mapping[str, Any]] = {}
+    for ch, val in data.items():
+        if isinstance(ch, str) and isinstance(val, dict):
+            out[ch] = _freeze({
+                "keyword_rtk": val.get("keyword_rtk"),
+                "keyword_rth": val.get("keyword_rth"),
+                "keyword_rsh": val.get("keyword_rsh"),
+                "index_hanja": val.get("index_hanja"),
+                "index_rtk": val.get("index_rtk"),
+                "index_rth": val.get("index_rth"),
+                "index_rsh": val.get("index_rsh"),
+            })
+    return out
+
+
+def _parse_lists(data: Any) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise ValueError("lists.json malformed: expected top-level object")
+    for name, bucket in data.items():
+        if not isinstance(bucket, dict) or not isinstance(bucket.get("chars"), list):
+            raise ValueError(f"lists.json malformed: '{name}' has no chars array")
+    return data
+
+
+def _load_kdef() -> Tuple[Mapping[str, str], str]:
+    raw, digest = _read(kdef_path)
+    return MappingProxyType(_parse_kdef(raw) if raw is not None else {}), digest
+
+
+def _load_cjk_learn() -> Tuple[Mapping[str, Mapping[str, Any]], str]:
+    raw, digest = _read(cjk_learn_path)
+    return MappingProxyType(_parse_cjk_learn(raw) if raw is not None else {}), digest
+
+
+def _load_lists() -> Tuple[Optional[Mapping[str, Any]], str]:
+    raw, digest = _read(lists_path)
+    return (_freeze(_parse_lists(raw)) if raw is not None else None), digest
+
+
+def load_snapshot(version: int) -> DataSnapshot:
+    """Read and validate every data file; raises ValueError/OSError on bad input.
+
+    A missing kDefinition/CJK_learn file yields an empty map and a missing
+    lists.json yields lists=None, as before hot reload existed.
+    """
+    kdef, kdef_digest = _load_kdef()
+    cjk_learn, cjk_digest = _load_cjk_learn()
+    lists, lists_digest = _load_lists()
+    tag = hashlib.blake2b(f"{kdef_digest}:{cjk_digest}:{lists_digest}".encode(), digest_size=8).hexdigest()
+    return DataSnapshot(
+        version=version,
+        tag=tag,
+        loaded_at=time.time(),
+        kdef=kdef,
+        cjk_learn=cjk_learn,
+        lists=lists,
+    )
+
+
+def _signature() -> Tuple[Tuple[int, int], ...]:
+    sig = []
+    for path in (kdef_path, cjk_learn_path, lists_path):
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((0, -1))
+    return tuple(sig)
+
+
+_lock = threading.Lock()
+_listeners: List[Callable[[DataSnapshot], None]] = []
+_seen_signature = _signature()
+last_error: Optional[str] = None
+
+try:
+    _snapshot = load_snapshot(1)
+except Exception as e:
+    # any parse/read error at startup -> serve empty data until the files are fixed
+    last_error = f"{type(e).__name__}: {e}"
+    _snapshot = DataSnapshot(1, "-", time.time(), MappingProxyType({}), MappingProxyType({}), None)
+
+
+def current() -> DataSnapshot:
+    """Return the active snapshot (a single atomic reference read)."""
+    return _snapshot
+
+
+def on_change(callback: Callable[[DataSnapshot], None]) -> None:
+    """Register callback(new_snapshot), called after each swap to drop derived caches."""
+    _listeners.append(callback)
+
+
+def reload(force: bool = False) -> bool:
+    """Load the data files again if they changed on disk; return True if a new version was swapped in.
+
+    Invalid files leave the active snapshot untouched (see last_error) and are
+    not retried until they change again.
+    """
+    global _snapshot, _seen_signature, last_error
+    with _lock:
+        sig = _signature()
+        if not force and sig == _seen_signature:
+            return False
+        _seen_signature = sig
+        try:
+            snap = load_snapshot(_snapshot.version + 1)
+        except Exception as e:
+            last_error = f"{type(e).__name__}: {e}"
+            return False
+        last_error = None
+        if snap.tag == _snapshot.tag:
+            # touched but identical content: keep the version and its caches
+            return False
+        _snapshot = snap
+    for callback in list(_listeners):
+        try:
+            callback(snap)
+        except Exception:
+            pass
+    return True
+
+
+_watcher: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+
+def start_watcher(interval: float = DATA_WATCH_INTERVAL) -> bool:
+    """Poll the data files every `interval` seconds in a daemon thread; no-op if interval <= 0."""
+    global _watcher
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return False
+    _watcher_stop.clear()
+
+    def run() -> None:
+        while not _watcher_stop.wait(interval):
+            reload()
+
+    _watcher = threading.Thread(target=run, name="data-watcher", daemon=True)
+    _watcher.start()
+    return True
+
+
+def stop_watcher() -> None:
+    _watcher_stop.set()
+
+
+def status() -> dict:
+    snap = _snapshot
+    return {
+        **snap.to_dict(),
+        "watching": _watcher is not None and _watcher.is_alive() and not _watcher_stop.is_set(),
+        "last_error": last_error,
+    }
+
+
+__all__ = ["DataSnapshot", "current", "on_change", "reload", "start_watcher", "stop_watcher", "status"]
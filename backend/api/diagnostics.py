@@ -0,0 +1,346 @@
+"""Memory diagnostics for the backend data structures, based on tracemalloc.
+
+Reports traced memory per subsystem (data files, get_info cache, cjkradlib,
+OpenCC, variant index, ...), the top allocation sites under get_info, and diffs
+between two snapshots to find allocation regressions or leaks.
+
+Used by the opt-in /debug/memory endpoints (DIAGNOSTICS=1) and as a CLI:
+
+    python -m backend.api.diagnostics capture -n 3000   # startup + traffic snapshots, report and diff
+    python -m backend.api.diagnostics report .memprof/traffic.tmsnap
+    python -m backend.api.diagnostics diff .memprof/a.tmsnap .memprof/b.tmsnap
+
+Only Python-level allocations are traced: native memory (e.g. OpenCC's C++
+dictionaries) shows up in `rss` but not in the subsystem totals.
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import re
+import sys
+import sysconfig
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DIAGNOSTICS_DIR = Path(os.environ.get("DIAGNOSTICS_DIR", str(ROOT / ".memprof")))
+# Frames kept per traced allocation; deep enough to reach our code from json/cjkradlib internals
+DIAGNOSTICS_FRAMES = int(os.environ.get("DIAGNOSTICS_FRAMES", "30"))
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# Subsystem -> functions whose allocations (and everything they call) it owns.
+# The innermost matching frame of a trace decides, so a finder built during a
+# get_info call is still counted under cjkradlib.
+_FUNCTION_RULES: Sequence[Tuple[str, str, str]] = (
+    ("data.kDefinition", "backend.api.data", "_load_kdef"),
+    ("data.CJK_learn", "backend.api.data", "_load_cjk_learn"),
+    ("data.lists", "backend.api.data", "_load_lists"),
+    ("cjkradlib", "backend.api.char", "_load_finder"),
+    ("opencc", "backend.api.convert", "load_converter"),
+    ("variant_index", "backend.api.variants", "build_variant_index"),
+    ("get_info", "backend.api.char", "_compute_info"),
+    # The result cache's own entries and bookkeeping (stored from get_info)
+    ("get_info", "backend.api.char", "get_info"),
+    ("get_info", "backend.api.char", "get_forms_batch"),
+    ("export", "backend.api.export", "export_list"),
+)
+# Fallback for traces not under any rule: package directory of the innermost frame
+_PACKAGE_RULES: Sequence[Tuple[str, str]] = (
+    ("cjkradlib", "cjkradlib"),
+    ("opencc", "opencc"),
+)
+
+
+def start(frames: int = DIAGNOSTICS_FRAMES) -> None:
+    """Start tracing if needed; call before importing the modules to attribute."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+class _Classifier:
+    """Map tracebacks to subsystem names (memoized per frame)."""
+
+    def __init__(self) -> None:
+        self.ranges: Dict[str, List[Tuple[int, int, str]]] = {}
+        for name, module, qualname in _FUNCTION_RULES:
+            try:
+                mod = __import__(module, fromlist=["_"])
+                obj = getattr(mod, qualname)
+                obj = getattr(obj, "__wrapped__", obj)
+                lines, first = inspect.getsourcelines(obj)
+                filename = inspect.getsourcefile(obj)
+            except Exception:
+                continue
+            if filename:
+                self.ranges.setdefault(filename, []).append((first, first + len(lines) - 1, name))
+        purelib = sysconfig.get_paths().get("purelib", "")
+        self.packages = [(name, os.path.join(purelib, pkg) + os.sep) for name, pkg in _PACKAGE_RULES]
+        self._memo: Dict[Tuple[str, int], Optional[str]] = {}
+
+    def _frame(self, filename: str, lineno: int) -> Optional[str]:
+        key = (filename, lineno)
+        if key not in self._memo:
+            hit = None
+            for first, last, name in self.ranges.get(filename, ()):
+                if first <= lineno <= last:
+                    hit = name
+                    break
+            self._memo[key] = hit
+        return self._memo[key]
+
+    def classify(self, traceback: tracemalloc.Traceback) -> str:
+        # tracemalloc tracebacks are ordered oldest call first
+        for frame in reversed(traceback):
+            name = self._frame(frame.filename, frame.lineno)
+            if name is not None:
+                return name
+        if len(traceback):
+            innermost = traceback[-1].filename
+            for name, prefix in self.packages:
+                if innermost.startswith(prefix):
+                    return name
+            if innermost.startswith(str(ROOT)):
+                return "app"
+        return "other"
+
+
+# Allocations of the tracing machinery itself, not of the app
+_EXCLUDED = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+def _site(frame: tracemalloc.Frame) -> str:
+    filename = frame.filename
+    paths = sysconfig.get_paths()
+    for prefix in (str(ROOT), paths.get("purelib", ""), paths.get("stdlib", "")):
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{filename}:{frame.lineno}"
+
+
+def _groups(snapshot: tracemalloc.Snapshot) -> List[tracemalloc.Statistic]:
+    """Traces grouped by full traceback (a few thousand groups, vs. millions of traces)."""
+    return [s for s in snapshot.statistics("traceback") if len(s.traceback) and s.traceback[-1].filename not in _EXCLUDED]
+
+
+def _aggregate(groups: List[tracemalloc.Statistic], classifier: _Classifier) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Sum groups per subsystem, per allocation site, and per site on the get_info hot path.
+
+    The hot path excludes one-off work a first call triggers (finders, converters,
+    variant index), which is attributed to its own subsystem.
+    """
+    out: Dict[str, Dict[str, Dict[str, int]]] = {"subsystems": {}, "sites": {}, "get_info_sites": {}}
+    for stat in groups:
+        site = _site(stat.traceback[-1])
+        subsystem = classifier.classify(stat.traceback)
+        keys = [("subsystems", subsystem), ("sites", site)]
+        if subsystem == "get_info":
+            keys.append(("get_info_sites", site))
+        for table, key in keys:
+            bucket = out[table].setdefault(key, {"size": 0, "count": 0})
+            bucket["size"] += stat.size
+            bucket["count"] += stat.count
+    return out
+
+
+def _ranked(table: Dict[str, Dict[str, int]], limit: Optional[int] = None, key: str = "size") -> Dict[str, Dict[str, int]]:
+    items = sorted(table.items(), key=lambda kv: -abs(kv[1][key]))
+    return dict(items[:limit] if limit else items)
+
+
+def report(snapshot: tracemalloc.Snapshot, limit: int = 15) -> dict:
+    """Subsystem totals, top allocation sites overall and under get_info."""
+    agg = _aggregate(_groups(snapshot), _Classifier())
+    return {
+        "traceback_limit": snapshot.traceback_limit,
+        "traced": sum(s["size"] for s in agg["subsystems"].values()),
+        "subsystems": _ranked(agg["subsystems"]),
+        "get_info_sites": _ranked(agg["get_info_sites"], limit),
+        "top_sites": _ranked(agg["sites"], limit),
+    }
+
+
+def diff(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, limit: int = 15) -> dict:
+    """Growth between two snapshots, per subsystem and per allocation site."""
+    classifier = _Classifier()
+    before, after = _aggregate(_groups(old), classifier), _aggregate(_groups(new), classifier)
+    out: dict = {}
+    for table in ("subsystems", "get_info_sites", "sites"):
+        zero = {"size": 0, "count": 0}
+        deltas = {
+            key: {
+                "size_diff": after[table].get(key, zero)["size"] - before[table].get(key, zero)["size"],
+                "count_diff": after[table].get(key, zero)["count"] - before[table].get(key, zero)["count"],
+                "size": after[table].get(key, zero)["size"],
+            }
+            for key in set(before[table]) | set(after[table])
+        }
+        out["top_sites" if table == "sites" else table] = _ranked(
+            deltas, None if table == "subsystems" else limit, key="size_diff"
+        )
+    return out
+
+
+def status() -> dict:
+    """Live process figures: tracing state, traced current/peak, RSS and cache sizes."""
+    from .char import cache_info
+    from .data import current
+
+    traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    info = cache_info()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None,
+        "traced_current": traced,
+        "traced_peak": peak,
+        "rss": _rss_bytes(),
+        "get_info_cache": {"size": info.currsize, "maxsize": info.maxsize, "hits": info.hits, "misses": info.misses},
+        "data_version": current().version,
+    }
+
+
+def snapshot_path(name: str) -> Path:
+    if not _NAME_RE.match(name):
+        raise ValueError("Invalid snapshot name. Use 1-64 of [A-Za-z0-9_.-]")
+    return DIAGNOSTICS_DIR / f"{name}.tmsnap"
+
+
+def take_snapshot(name: Optional[str] = None) -> Tuple[str, tracemalloc.Snapshot]:
+    """Take a snapshot and dump it under DIAGNOSTICS_DIR for later diffs."""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not tracing (start the server with DIAGNOSTICS=1)")
+    name = name or time.strftime("%Y%m%dT%H%M%S")
+    path = snapshot_path(name)
+    snap = tracemalloc.take_snapshot()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    snap.dump(str(path))
+    return name, snap
+
+
+def load_snapshot(name: str) -> tracemalloc.Snapshot:
+    path = snapshot_path(name)
+    if not path.exists():
+        raise FileNotFoundError(str(path))
+    return tracemalloc.Snapshot.load(str(path))
+
+
+# ---------------------------------------------------------------- CLI
+
+
+def _mib(n: int) -> str:
+    return f"{n / 2 ** 20:+.2f}" if n < 0 else f"{n / 2 ** 20:.2f}"
+
+
+def _print_report(rep: dict) -> None:
+    print(f"traced: {_mib(rep['traced'])} MiB (traceback limit {rep['traceback_limit']})")
+    print(f"\n{'subsystem':<20}{'MiB':>10}{'blocks':>12}")
+    for name, s in rep["subsystems"].items():
+        print(f"{name:<20}{_mib(s['size']):>10}{s['count']:>12}")
+    for title, key in (("get_info allocation sites", "get_info_sites"), ("top allocation sites", "top_sites")):
+        print(f"\n{title}:")
+        for site, s in rep[key].items():
+            print(f"  {s['size'] / 1024:>10.1f} KiB {s['count']:>8}  {site}")
+
+
+def _print_diff(d: dict) -> None:
+    print(f"{'subsystem':<20}{'Δ MiB':>10}{'Δ blocks':>12}{'MiB':>10}")
+    for name, s in d["subsystems"].items():
+        print(f"{name:<20}{_mib(s['size_diff']):>10}{s['count_diff']:>+12}{_mib(s['size']):>10}")
+    for title, key in (("get_info sites", "get_info_sites"), ("top sites", "top_sites")):
+        print(f"\n{title} (growth):")
+        for site, s in d[key].items():
+            print(f"  {s['size_diff'] / 1024:>+10.1f} KiB {s['count_diff']:>+8}  {site}")
+
+
+def _load_file(path: str) -> tracemalloc.Snapshot:
+    return tracemalloc.Snapshot.load(path)
+
+
+def _capture(args: argparse.Namespace) -> Tuple[dict, dict]:
+    start(args.frames)
+    from . import char, list as lists
+
+    def dump(name: str) -> tracemalloc.Snapshot:
+        snap = tracemalloc.take_snapshot()
+        out = Path(args.out) / f"{name}.tmsnap"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        snap.dump(str(out))
+        print(f"saved {os.path.relpath(out, os.getcwd())}", file=sys.stderr)
+        return snap
+
+    chars = lists.warmup_chars()[: args.requests]
+    char.get_info(chars[0])  # builds finders, converters and the variant index
+    startup = dump("startup")
+    for _ in range(args.rounds):
+        for ch in chars:
+            char.get_info(ch)
+    traffic = dump("traffic")
+    return report(traffic, args.limit), diff(startup, traffic, args.limit)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m backend.api.diagnostics", description="tracemalloc memory diagnostics.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    cap = sub.add_parser("capture", help="Trace startup and get_info traffic in-process, then report and diff")
+    cap.add_argument("-n", "--requests", type=int, default=2000, help="Distinct list characters to look up (default: 2000)")
+    cap.add_argument("--rounds", type=int, default=1, help="Times to replay the lookups (leaks grow with rounds)")
+    cap.add_argument("--frames", type=int, default=DIAGNOSTICS_FRAMES, help="tracemalloc frames per trace")
+    cap.add_argument("--out", default=str(DIAGNOSTICS_DIR), help="Directory for the .tmsnap dumps")
+    rep = sub.add_parser("report", help="Report one snapshot dump")
+    rep.add_argument("snapshot")
+    dif = sub.add_parser("diff", help="Compare two snapshot dumps (old, new)")
+    dif.add_argument("old")
+    dif.add_argument("new")
+    for p in (cap, rep, dif):
+        p.add_argument("--limit", type=int, default=15, help="Allocation sites to list (default: 15)")
+        p.add_argument("--json", action="store_true", help="Print JSON instead of tables")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "capture":
+        r, d = _capture(args)
+        if args.json:
+            print(json.dumps({"report": r, "diff": d}, indent=2))
+        else:
+            _print_report(r)
+            print("\n--- startup -> traffic ---")
+            _print_diff(d)
+    elif args.cmd == "report":
+        r = report(_load_file(args.snapshot), args.limit)
+        if args.json:
+            print(json.dumps(r, indent=2))
+        else:
+            _print_report(r)
+    else:
+        d = diff(_load_file(args.old), _load_file(args.new), args.limit)
+        if args.json:
+            print(json.dumps(d, indent=2))
+        else:
+            _print_diff(d)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+from typing import Any, Iterator, List, Mapping, Optional, Sequence
+
+from . import data
+from .char import get_forms_batch
+
+
+EXPORT_FORMATS = {"csv", "anki"}
+# Characters enriched (and rows emitted) per batch
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "256"))
+
+FORM_COLUMNS = ["simplified", "traditional", "japanese"]
+
+
+def _anki_field(value: Any) -> str:
+    # Anki's TSV importer has no escaping with #html:false: keep each field on one line
+    if value is None:
+        return ""
+    return " ".join(str(value).replace("\t", " ").splitlines())
+
+
+def _rows(
+    chars: Sequence[str], fields: Mapping[str, Any], kdef: Mapping[str, str], columns: List[str], batch_size: int
+) -> Iterator[List[List[Any]]]:
+    """Yield rows batch by batch: list fields, then definition and S/T/J forms."""
+    for i in range(0, len(chars), batch_size):
+        batch = chars[i:i + batch_size]
+        forms = get_forms_batch(list(batch))
+        rows = []
+        for ch, (_detected, simplified, traditional, japanese) in zip(batch, forms):
+            meta = fields.get(ch) or {}
+            rows.append(
+                [ch]
+                + [meta.get(c) for c in columns]
+                + [kdef.get(ch), simplified, traditional, japanese]
+            )
+        yield rows
+
+
+def export_list(
+    *,
+    type: str,
+    format: str = "csv",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str]:
+    """Return an iterator of text pieces forming a CSV or Anki TSV export of one list.
+
+    - type: one of 'rtk', 'rth', 'rsh', 'hanja'
+    - format: 'csv' (with header row) | 'anki' (TSV with Anki import headers)
+    - start/end: 1-based inclusive positions in the list (default: whole list)
+
+    Arguments are validated before the iterator is returned, so errors surface
+    before any output is produced; rows are then generated one batch at a time.
+    """
+    # One snapshot for the whole export, even if the data is reloaded mid-stream
+    snap = data.current()
+    if snap.lists is None:
+        raise FileNotFoundError(data.lists_path)
+    if type not in snap.lists:
+        raise ValueError(f"Invalid type '{type}'. Expected one of {sorted(snap.lists.keys())}")
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format. Expected one of {sorted(EXPORT_FORMATS)}")
+    bucket = snap.lists[type]
+    if not isinstance(bucket, Mapping) or not isinstance(bucket.get("chars"), Sequence):
+        raise ValueError(f"List '{type}' has no chars")
+    chars: Sequence[str] = bucket["chars"]
+    fields: Mapping[str, Any] = bucket.get("fields") or {}
+
+    first = 1 if start is None else start
+    last = len(chars) if end is None else min(end, len(chars))
+    if first < 1 or last < first:
+        raise ValueError(f"Invalid range {start}..{end} for list '{type}' of {len(chars)} chars")
+    chars = chars[first - 1:last]
+
+    sample = next((v for v in fields.values() if isinstance(v, Mapping)), {})
+    columns = list(sample.keys())
+    header = ["char"] + columns + ["definition"] + FORM_COLUMNS
+    size = max(1, batch_size)
+
+    def generate_csv() -> Iterator[str]:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(header)
+        yield buf.getvalue()
+        for rows in _rows(chars, fields, snap.kdef, columns, size):
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(rows)
+            yield buf.getvalue()
+
+    def generate_anki() -> Iterator[str]:
+        anki_columns = "\t".join(header + ["tags"])
+        yield (
+            "#separator:tab\n"
+            "#html:false\n"
+            f"#columns:{anki_columns}\n"
+            f"#tags column:{len(header) + 1}\n"
+        )
+        tag = f"learnCJK::{type}"
+        for rows in _rows(chars, fields, snap.kdef, columns, size):
+            yield "".join("\t".join(_anki_field(v) for v in row + [tag]) + "\n" for row in rows)
+
+    return generate_csv() if format == "csv" else generate_anki()
+
+
+__all__ = ["export_list", "EXPORT_FORMATS"]
@@ -72,4 +72,28 @@ class CharacterInfo:
         }
 
 
-__all__ = ["Form", "Composition", "CharacterInfo", "CJKLearn"]
+@dataclass
+class VariantMember:
+    char: str
+    roles: List[str]
+
+    def to_dict(self) -> dict:
+        return {"char": self.char, "roles": self.roles}
+
+
+@dataclass
+class VariantCluster:
+    """All characters linked to `char` by variant or S/T/J conversion edges."""
+    char: str
+    cluster_id: Optional[int]
+    members: List[VariantMember]
+
+    def to_dict(self) -> dict:
+        return {
+            "char": self.char,
+            "cluster_id": self.cluster_id,
+            "members": [m.to_dict() for m in self.members],
+        }
+
+
+__all__ = ["Form", "Composition", "CharacterInfo", "CJKLearn", "VariantMember", "VariantCluster"]
@@ -1,21 +1,16 @@
 from __future__ import annotations
 
-import json
-import os
-from typing import Any, Dict
+from typing import Any, List, Mapping, Sequence
 
+from .data import current, lists_path
 
-def _load_lists() -> Dict[str, Any]:
-    base = os.path.dirname(__file__)
-    data_dir = os.path.normpath(os.path.join(base, os.pardir, "data"))
-    lists_path = os.path.join(data_dir, "lists.json")
-    if not os.path.exists(lists_path):
+
+def _load_lists() -> Mapping[str, Any]:
+    """Return lists.json from the current data snapshot (parsed once per data version)."""
+    lists = current().lists
+    if lists is None:
         raise FileNotFoundError(lists_path)
-    with open(lists_path, "r", encoding="utf-8") as fh:
-        data = json.load(fh)
-    if not isinstance(data, dict):
-        raise ValueError("lists.json malformed: expected top-level object")
-    return data
+    return lists
 
 
 def get_list(*, type: str, field: str) -> Any:
@@ -23,6 +18,8 @@ def get_list(*, type: str, field: str) -> Any:
 
     - type: one of 'rtk', 'rth', 'rsh', 'hanja'
     - field: 'chars' | 'fields'
+
+    The value is read-only (tuples and mapping proxies from the data snapshot).
     """
     data = _load_lists()
     if type not in data:
@@ -30,6 +27,28 @@ def get_list(*, type: str, field: str) -> Any:
     if field not in {"chars", "fields"}:
         raise ValueError("Invalid field. Expected 'chars' or 'fields'")
     bucket = data[type]
-    if not isinstance(bucket, dict) or field not in bucket:
+    if not isinstance(bucket, Mapping) or field not in bucket:
         raise ValueError(f"Field '{field}' not available for type '{type}'")
     return bucket[field]
+
+
+def warmup_chars() -> List[str]:
+    """Return every list character once, in warm-up priority order.
+
+    Lists are interleaved rank by rank (1st of each list, then 2nd, ...) so the
+    characters learners meet first across RTK/RTH/RSH/Hanja come first.
+    """
+    data = _load_lists()
+    columns: List[List[str]] = []
+    for bucket in data.values():
+        chars = bucket.get("chars") if isinstance(bucket, Mapping) else None
+        if isinstance(chars, Sequence):
+            columns.append([c for c in chars if isinstance(c, str) and c])
+    seen = set()
+    out: List[str] = []
+    for rank in range(max((len(c) for c in columns), default=0)):
+        for col in columns:
+            if rank < len(col) and col[rank] not in seen:
+                seen.add(col[rank])
+                out.append(col[rank])
+    return out
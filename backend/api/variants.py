@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+# Script role bits; a character can hold several (e.g. 国 is both simplified and japanese)
+ROLE_TRADITIONAL = 1
+ROLE_SIMPLIFIED = 2
+ROLE_JAPANESE = 4
+ROLE_VARIANT = 8
+
+ROLE_NAMES: Tuple[Tuple[int, str], ...] = (
+    (ROLE_TRADITIONAL, "traditional"),
+    (ROLE_SIMPLIFIED, "simplified"),
+    (ROLE_JAPANESE, "japanese"),
+    (ROLE_VARIANT, "variant"),
+)
+
+# OpenCC config -> (role of the input char, role of the output char)
+CONVERSION_ROLES: Dict[str, Tuple[int, int]] = {
+    "s2t": (ROLE_SIMPLIFIED, ROLE_TRADITIONAL),
+    "t2s": (ROLE_TRADITIONAL, ROLE_SIMPLIFIED),
+    "t2jp": (ROLE_TRADITIONAL, ROLE_JAPANESE),
+    "jp2t": (ROLE_JAPANESE, ROLE_TRADITIONAL),
+}
+
+
+def role_names(mask: int) -> List[str]:
+    return [name for bit, name in ROLE_NAMES if mask & bit]
+
+
+class _UnionFind:
+    """Union-find over characters with path halving and union by size."""
+
+    def __init__(self) -> None:
+        self.parent: Dict[str, str] = {}
+        self.size: Dict[str, int] = {}
+
+    def find(self, x: str) -> str:
+        parent = self.parent
+        if x not in parent:
+            parent[x] = x
+            self.size[x] = 1
+            return x
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: str, b: str) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+
+class VariantIndex:
+    """Precomputed clusters of characters linked by Unihan variants or S/T/J conversion.
+
+    - cluster_of: char -> integer cluster ID (only chars sharing a cluster with another char)
+    - clusters: cluster ID -> ((member, role names), ...) sorted by code point
+    - variants: char -> direct Unihan variants, as returned by RadicalFinder
+    """
+
+    def __init__(
+        self,
+        cluster_of: Dict[str, int],
+        clusters: List[Tuple[Tuple[str, Tuple[str, ...]], ...]],
+        variants: Dict[str, Tuple[str, ...]],
+    ) -> None:
+        self.cluster_of = cluster_of
+        self.clusters = clusters
+        self.variants = variants
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    def cluster_id(self, char: str) -> Optional[int]:
+        return self.cluster_of.get(char)
+
+    def members(self, char: str) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+        """Return ((member, roles), ...) for the cluster of char; a lone char is its own cluster."""
+        cid = self.cluster_of.get(char)
+        if cid is None:
+            return ((char, ()),)
+        return self.clusters[cid]
+
+    def variants_of(self, char: str) -> Tuple[str, ...]:
+        return self.variants.get(char, ())
+
+
+def build_variant_index(
+    variant_entries: Mapping[str, Sequence[str]],
+    converters: Mapping[str, Callable[[str], str]],
+    extra_chars: Iterable[str] = (),
+) -> VariantIndex:
+    """Build a VariantIndex.
+
+    - variant_entries: Unihan variant map (char -> variant chars)
+    - converters: CONVERSION_ROLES key -> single-string convert function
+    - extra_chars: further characters to run through the converters (e.g. data file keys)
+    """
+    uf = _UnionFind()
+    roles: Dict[str, int] = {}
+    variants: Dict[str, Tuple[str, ...]] = {}
+
+    def link(a: str, b: str, role_a: int, role_b: int) -> None:
+        uf.union(a, b)
+        roles[a] = roles.get(a, 0) | role_a
+        roles[b] = roles.get(b, 0) | role_b
+
+    universe = set(extra_chars)
+    for ch, vs in variant_entries.items():
+        others = tuple(v for v in vs if v != ch)
+        if others:
+            variants[ch] = tuple(vs)
+        universe.add(ch)
+        for v in others:
+            universe.add(v)
+            link(ch, v, ROLE_VARIANT, ROLE_VARIANT)
+
+    for name, convert in converters.items():
+        role_in, role_out = CONVERSION_ROLES[name]
+        for ch in universe:
+            try:
+                out = convert(ch)
+            except Exception:
+                continue
+            if out != ch and len(out) == 1:
+                link(ch, out, role_in, role_out)
+
+    groups: Dict[str, List[str]] = {}
+    for ch in uf.parent:
+        groups.setdefault(uf.find(ch), []).append(ch)
+
+    cluster_of: Dict[str, int] = {}
+    clusters: List[Tuple[Tuple[str, Tuple[str, ...]], ...]] = []
+    # Deterministic IDs: order clusters by their smallest member
+    for members in sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: g[0]):
+        cid = len(clusters)
+        clusters.append(tuple((m, tuple(role_names(roles.get(m, 0)))) for m in members))
+        for m in members:
+            cluster_of[m] = cid
+
+    return VariantIndex(cluster_of, clusters, variants)
+
+
+__all__ = [
+    "VariantIndex",
+    "build_variant_index",
+    "role_names",
+    "ROLE_TRADITIONAL",
+    "ROLE_SIMPLIFIED",
+    "ROLE_JAPANESE",
+    "ROLE_VARIANT",
+]
@@ -1,18 +1,39 @@
 from __future__ import annotations
 
+import asyncio
+import codecs
+import hashlib
 import os
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from importlib import metadata
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse, Response
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.requests import ClientDisconnect
 
-from backend.api.char import get_info
-from backend.api.list import get_list
+from backend.api import diagnostics
+
+# Opt-in memory diagnostics: trace before the backend modules load their data
+DIAGNOSTICS = os.environ.get("DIAGNOSTICS", "0").lower() in {"1", "true", "yes", "on"}
+if DIAGNOSTICS:
+    diagnostics.start()
+
+from backend.api import data
+from backend.api.char import INFO_CACHE_SIZE, get_info, get_variant_cluster, refresh_variant_index
+from backend.api.convert import ChunkSplitter, conversion_steps, convert_text
+from backend.api.export import export_list
+from backend.api.list import get_list, warmup_chars
 
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -82,15 +103,234 @@ def ensure_ts_built() -> None:
             pass
 
 
-app = FastAPI(title="learnCJK.dev", version="0.2.0")
+# Startup cache warm-up (opt-in): WARMUP=1 walks lists.json and fills the get_info cache.
+WARMUP = os.environ.get("WARMUP", "0").lower() in {"1", "true", "yes", "on"}
+# Pause between two warmed characters, to leave CPU for live requests
+WARMUP_DELAY_MS = float(os.environ.get("WARMUP_DELAY_MS", "0"))
+# Max number of characters to warm (0 = all list characters)
+WARMUP_LIMIT = int(os.environ.get("WARMUP_LIMIT", "0"))
+
+
+@dataclass
+class WarmupState:
+    enabled: bool = False
+    total: int = 0
+    done: int = 0
+    errors: int = 0
+    runs: int = 0
+    warmed: bool = False
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        # Sticky once the startup run is done: a re-warm after a data reload keeps serving
+        return not self.enabled or self.warmed
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.monotonic()) - self.started_at, 3)
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "runs": self.runs,
+            "total": self.total,
+            "done": self.done,
+            "errors": self.errors,
+            "progress": round(self.done / self.total, 4) if self.total else (1.0 if self.ready else 0.0),
+            "elapsed_s": elapsed,
+        }
+
+
+warmup_state = WarmupState(enabled=WARMUP)
+
+
+async def run_warmup(state: WarmupState) -> None:
+    """Fill the get_info cache for list characters without blocking the event loop.
+
+    Each lookup runs in a worker thread; WARMUP_DELAY_MS throttles the walk.
+    Runs at startup and again after each data reload (which empties the cache).
+    """
+    state.runs += 1
+    state.total = state.done = state.errors = 0
+    state.started_at = time.monotonic()
+    state.finished_at = None
+    cancelled = False
+    try:
+        try:
+            chars: List[str] = await asyncio.to_thread(warmup_chars)
+        except (FileNotFoundError, ValueError):
+            chars = []
+        # Warming past the cache size would evict the highest-priority characters first
+        chars = chars[:min(WARMUP_LIMIT or len(chars), max(INFO_CACHE_SIZE, 0))]
+        state.total = len(chars)
+        delay = max(WARMUP_DELAY_MS, 0.0) / 1000.0
+        for ch in chars:
+            try:
+                await asyncio.to_thread(get_info, ch, "auto")
+            except Exception:
+                state.errors += 1
+            state.done += 1
+            # Always yield, even unthrottled, so request handlers get scheduled
+            await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        # Superseded by a newer run (or shutdown): leave the state to that run
+        cancelled = True
+        raise
+    finally:
+        if not cancelled:
+            state.finished_at = time.monotonic()
+            state.warmed = True
+
+
+_warmup_task: Optional[asyncio.Task] = None
+_warmup_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _start_warmup() -> None:
+    """(Re)start the warm-up on the running loop, cancelling a run in progress."""
+    global _warmup_task
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+    _warmup_task = asyncio.get_running_loop().create_task(run_warmup(warmup_state))
+
+
+def _rewarm_on_reload(_snap: data.DataSnapshot) -> None:
+    # Called from the data watcher thread after the get_info cache was cleared
+    loop = _warmup_loop
+    if loop is not None and warmup_state.enabled:
+        loop.call_soon_threadsafe(_start_warmup)
+
+
+data.on_change(_rewarm_on_reload)
+
+
+async def _stop_warmup() -> None:
+    task = _warmup_task
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def _prepare_variant_index() -> None:
+    try:
+        refresh_variant_index()
+    except Exception:
+        # Lookups build it on demand instead
+        pass
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global _warmup_loop
+    # Build the variant index in the background so the first lookups do not wait for it
+    threading.Thread(target=_prepare_variant_index, name="variant-index", daemon=True).start()
+    # Hot reload of data files (DATA_WATCH_INTERVAL seconds, 0 = off)
+    data.start_watcher()
+    if warmup_state.enabled:
+        _warmup_loop = asyncio.get_running_loop()
+        _start_warmup()
+    try:
+        yield
+    finally:
+        data.stop_watcher()
+        _warmup_loop = None
+        await _stop_warmup()
+
+
+app = FastAPI(title="learnCJK.dev", version="0.2.0", lifespan=lifespan)
+
+
+def _code_id() -> str:
+    """Identify the code serving responses: BUILD_ID if set, else a digest of the app
+    version, the backend/server sources and the OpenCC/cjkradlib versions."""
+    build_id = os.environ.get("BUILD_ID")
+    if build_id:
+        return build_id
+    h = hashlib.blake2b(app.version.encode(), digest_size=6)
+    for dist in ("opencc", "cjkradlib"):
+        try:
+            h.update(f"{dist}={metadata.version(dist)}".encode())
+        except metadata.PackageNotFoundError:
+            pass
+    for path in sorted((ROOT / "backend" / "api").glob("*.py")) + [Path(__file__).resolve()]:
+        try:
+            h.update(path.read_bytes())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+CODE_ID = _code_id()
+
+
+def data_etag(response: Response) -> None:
+    """Route dependency: tag the response with the code build and the data version.
+
+    Only routes whose output is a pure function of those two use it; a deploy or
+    a data reload changes the tag, so stale bodies are never revalidated.
+    """
+    response.headers["ETag"] = f'W/"{CODE_ID}-{data.current().tag}"'
+
+
+class ConditionalGetMiddleware:
+    """Answer If-None-Match with 304 when a GET route would return 200 with that ETag.
+
+    The route runs (validation, errors and all) and sets its own ETag; only a
+    successful response is swapped for an empty 304, so 404/422/400 stay intact.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        if_none_match = b",".join(v for k, v in scope["headers"] if k == b"if-none-match")
+        if not if_none_match:
+            await self.app(scope, receive, send)
+            return
+        candidates = {t.strip() for t in if_none_match.split(b",")}
+        not_modified = False
+
+        async def send_conditional(message) -> None:
+            nonlocal not_modified
+            if message["type"] == "http.response.start":
+                etag = next((v for k, v in message.get("headers", []) if k.lower() == b"etag"), None)
+                if message["status"] == 200 and etag is not None and (etag in candidates or b"*" in candidates):
+                    not_modified = True
+                    await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag)]})
+                    return
+            elif message["type"] == "http.response.body" and not_modified:
+                if not message.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b""})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_conditional)
+
+
+app.add_middleware(ConditionalGetMiddleware)
 
 
 @app.get("/healthz")
 def healthz() -> dict:
-    return {"status": "ok"}
+    return {"status": "ok", "warmup": warmup_state.to_dict(), "data": data.status()}
 
 
-@app.get("/api/char")
+@app.get("/readyz")
+def readyz() -> JSONResponse:
+    # 503 until warm-up completes, so a load balancer can hold traffic back
+    body = {"status": "ready" if warmup_state.ready else "warming", "warmup": warmup_state.to_dict()}
+    return JSONResponse(body, status_code=200 if warmup_state.ready else 503)
+
+
+@app.get("/api/char", dependencies=[Depends(data_etag)])
 def api_char(char: str, output_format: Optional[str] = None):
     if not char:
         raise HTTPException(status_code=400, detail="Query parameter 'char' is required")
@@ -98,7 +338,139 @@ def api_char(char: str, output_format: Optional[str] = None):
     return ci.to_dict()
 
 
-@app.get("/api/lists")
+@app.get("/api/variants", dependencies=[Depends(data_etag)])
+def api_variants(char: str):
+    if not char:
+        raise HTTPException(status_code=400, detail="Query parameter 'char' is required")
+    try:
+        return get_variant_cluster(char).to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Request bodies of /api/convert are buffered in memory up to this size, then on disk
+CONVERT_SPOOL_BYTES = int(os.environ.get("CONVERT_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+
+class BodySpool:
+    """Drain a request body into a spooled temp file while it is being consumed.
+
+    Reading the body in its own task means a client that uploads everything
+    before reading the response cannot deadlock against our streamed output.
+    Once the body is in, the task keeps listening for the client going away
+    and sets `disconnected`.
+    """
+
+    def __init__(self, max_memory: int = CONVERT_SPOOL_BYTES) -> None:
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self.written = 0
+        self.read_pos = 0
+        self.done = False
+        self.disconnected = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+
+    async def fill(self, request: Request) -> None:
+        try:
+            async for piece in request.stream():
+                if piece:
+                    self.file.seek(self.written)
+                    self.file.write(piece)
+                    self.written += len(piece)
+                    self.changed.set()
+        except ClientDisconnect:
+            self.disconnected = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.changed.set()
+        # Body complete: the only message left to come is the disconnect
+        while not self.disconnected and self.error is None:
+            if (await request.receive())["type"] == "http.disconnect":
+                self.disconnected = True
+                self.changed.set()
+
+    async def read(self, size: int) -> bytes:
+        """Return up to size bytes, waiting for more input; b"" once the body is consumed or the client left."""
+        while not self.disconnected and self.read_pos == self.written:
+            if self.error is not None:
+                raise self.error
+            if self.done:
+                return b""
+            self.changed.clear()
+            await self.changed.wait()
+        if self.disconnected:
+            return b""
+        self.file.seek(self.read_pos)
+        data = self.file.read(min(size, self.written - self.read_pos))
+        self.read_pos += len(data)
+        if self.read_pos == self.written and not self.done:
+            # Everything buffered was consumed: rewind so the spool stays small
+            self.file.seek(0)
+            self.file.truncate()
+            self.read_pos = self.written = 0
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse whose iterator itself reads the request body.
+
+    The stock class listens for client disconnects by calling receive() in
+    parallel, which would steal body messages from the iterator; here the
+    BodySpool task is the only receiver and reports the disconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+@app.post("/api/convert")
+async def api_convert(request: Request, source: str, target: str) -> StreamingResponse:
+    """Convert a UTF-8 text body between scripts, streaming converted chunks back.
+
+    Memory stays bounded: input is spooled (to disk past CONVERT_SPOOL_BYTES) and
+    converted in chunks of CONVERT_CHUNK_CHARS cut on safe boundaries.
+    """
+    try:
+        steps = conversion_steps(source, target)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def converted():
+        spool = BodySpool()
+        filler = asyncio.create_task(spool.fill(request))
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        splitter = ChunkSplitter()
+        try:
+            while True:
+                piece = await spool.read(64 * 1024)
+                if not piece:
+                    break
+                for chunk in splitter.feed(decoder.decode(piece)):
+                    if spool.disconnected:
+                        # Nobody reads the output any more: stop converting, quietly
+                        return
+                    yield await run_in_threadpool(convert_text, chunk, steps)
+            if spool.disconnected:
+                return
+            # A truncated trailing sequence decodes to U+FFFD, which may complete a chunk
+            for chunk in splitter.feed(decoder.decode(b"", final=True)):
+                yield await run_in_threadpool(convert_text, chunk, steps)
+            tail = splitter.flush()
+            if tail:
+                yield await run_in_threadpool(convert_text, tail, steps)
+        finally:
+            filler.cancel()
+            spool.close()
+
+    return BodyStreamingResponse(converted(), media_type="text/plain; charset=utf-8")
+
+
+@app.get("/api/lists", dependencies=[Depends(data_etag)])
 def api_lists(type: str, field: str):
     try:
         return get_list(type=type, field=field)
@@ -108,6 +480,55 @@ def api_lists(type: str, field: str):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/api/export")
+def api_export(type: str, format: str = "csv", start: Optional[int] = None, end: Optional[int] = None):
+    try:
+        rows = export_list(type=type, format=format, start=start, end=end)
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail="lists.json not found. Generate it with cjk_list_to_json.py")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    suffix = f"_{start or 1}-{end or ''}" if start or end else ""
+    if format == "csv":
+        media_type, filename = "text/csv; charset=utf-8", f"{type}{suffix}.csv"
+    else:
+        media_type, filename = "text/tab-separated-values; charset=utf-8", f"{type}{suffix}.anki.txt"
+    # Sync iterator: Starlette pulls each batch in the threadpool
+    return StreamingResponse(rows, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+if DIAGNOSTICS:
+
+    @app.get("/debug/memory")
+    def debug_memory(limit: int = 15) -> dict:
+        """Live memory status plus a subsystem / allocation-site report of a fresh snapshot."""
+        import tracemalloc
+
+        return {"status": diagnostics.status(), "report": diagnostics.report(tracemalloc.take_snapshot(), limit)}
+
+    @app.post("/debug/memory/snapshots")
+    def debug_memory_snapshot(name: Optional[str] = None) -> dict:
+        try:
+            name, _snap = diagnostics.take_snapshot(name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"name": name, "path": str(diagnostics.snapshot_path(name)), "status": diagnostics.status()}
+
+    @app.get("/debug/memory/diff")
+    def debug_memory_diff(base: str, head: Optional[str] = None, limit: int = 15) -> dict:
+        """Growth from snapshot `base` to snapshot `head` (default: a fresh snapshot)."""
+        import tracemalloc
+
+        try:
+            old = diagnostics.load_snapshot(base)
+            new = diagnostics.load_snapshot(head) if head else tracemalloc.take_snapshot()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=f"Snapshot not found: {e}")
+        return diagnostics.diff(old, new, limit)
+
+
 # Pre-build assets opportunistically
 ensure_css()
 
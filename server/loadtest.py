@@ -0,0 +1,453 @@
+"""Async load generator for the learnCJK.dev server.
+
+Drives the FastAPI app either in-process (ASGI calls, no sockets) or against a
+running server (e.g. `make run`), replaying a weighted mix of routes. Characters
+for /api/char and /char/:ch are drawn from a Zipf distribution over list order
+(RTK/RTH/RSH/Hanja interleaved by rank), so popular characters repeat the way
+real traffic does.
+
+Usage:
+    python server/loadtest.py                          # in-process, 30s
+    python server/loadtest.py --url http://127.0.0.1:8000 -c 32 -d 60
+    python server/loadtest.py --mix char=70,lists=10,page=10,static=10
+    python server/loadtest.py --mix convert=1 --convert-kib 1024    # /api/convert throughput
+    python server/loadtest.py --compare .loadtest/<previous>.json
+
+Results (per-route throughput in req/s and MiB/s, p50/p95/p99 latency, error
+rate) are printed and saved as JSON under .loadtest/ for comparison between runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.api.list import warmup_chars  # noqa: E402
+
+
+RESULTS_DIR = ROOT / ".loadtest"
+DEFAULT_MIX = "char=80,lists=5,page=10,static=5"
+LIST_TYPES = ["rtk", "rth", "rsh", "hanja"]
+BODY_PIECE = 64 * 1024
+STATIC_PATHS = ["/static/css/app.css", "/static/html/header.html", "/static/html/footer.html"]
+
+# (method, path with query string, request body)
+Req = Tuple[str, str, bytes]
+# (status, response body size) for one request; raises on transport errors
+Fetch = Callable[[Req], Awaitable[Tuple[int, int]]]
+
+
+# ---------------------------------------------------------------- traffic
+
+
+class ZipfChars:
+    """Sample characters with P(rank r) proportional to 1 / r**s."""
+
+    def __init__(self, chars: List[str], s: float, rng: random.Random) -> None:
+        if not chars:
+            raise ValueError("no characters to sample from (is lists.json present?)")
+        self.chars = chars
+        self.rng = rng
+        self.cum = list(itertools.accumulate(1.0 / (r ** s) for r in range(1, len(chars) + 1)))
+
+    def sample(self) -> str:
+        i = bisect.bisect_left(self.cum, self.rng.random() * self.cum[-1])
+        return self.chars[min(i, len(self.chars) - 1)]
+
+
+@dataclass
+class Traffic:
+    chars: ZipfChars
+    convert_body: bytes = b""
+
+
+def make_convert_body(chars: ZipfChars, kib: int) -> bytes:
+    """Zipf-sampled text with CJK punctuation and line breaks, about `kib` KiB of UTF-8."""
+    parts: List[str] = []
+    size = 0
+    while size < kib * 1024:
+        line = "".join(chars.sample() for _ in range(chars.rng.randint(8, 40)))
+        line += chars.rng.choice(["。", "，", "！", "？"]) + "\n"
+        parts.append(line)
+        size += len(line.encode("utf-8"))
+    return "".join(parts).encode("utf-8")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route '{name}' in mix. Expected one of {sorted(ROUTES)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("mix must contain at least one positive weight")
+    return mix
+
+
+def _route_char(t: Traffic, rng: random.Random) -> Req:
+    return "GET", "/api/char?char=" + quote(t.chars.sample()), b""
+
+
+def _route_lists(_t: Traffic, rng: random.Random) -> Req:
+    return "GET", f"/api/lists?type={rng.choice(LIST_TYPES)}&field={rng.choice(['chars', 'fields'])}", b""
+
+
+def _route_page(t: Traffic, rng: random.Random) -> Req:
+    return "GET", rng.choice(["/", "/lists", "/char/" + quote(t.chars.sample())]), b""
+
+
+def _route_static(_t: Traffic, rng: random.Random) -> Req:
+    return "GET", rng.choice(STATIC_PATHS), b""
+
+
+def _route_convert(t: Traffic, rng: random.Random) -> Req:
+    source, target = rng.choice([("sc", "tc"), ("tc", "sc"), ("sc", "jp"), ("tc", "jp")])
+    return "POST", f"/api/convert?source={source}&target={target}", t.convert_body
+
+
+# Route label -> request generator; labels are what results are grouped by
+ROUTES: Dict[str, Callable[[Traffic, random.Random], Req]] = {
+    "char": _route_char,
+    "lists": _route_lists,
+    "page": _route_page,
+    "static": _route_static,
+    "convert": _route_convert,
+}
+
+
+# ---------------------------------------------------------------- transports
+
+
+def asgi_fetcher(app) -> Fetch:
+    """Call the ASGI app directly; the response body is drained but not kept."""
+
+    async def fetch(req: Req) -> Tuple[int, int]:
+        method, path_qs, body = req
+        path, _, qs = path_qs.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": unquote(path),
+            "raw_path": path.encode(),
+            "query_string": qs.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"loadtest"), (b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+        }
+        # Deliver the body in socket-sized pieces, as a server would
+        pieces = [body[i:i + BODY_PIECE] for i in range(0, len(body), BODY_PIECE)] or [b""]
+        status = 0
+        size = 0
+
+        async def receive() -> dict:
+            if pieces:
+                piece = pieces.pop(0)
+                return {"type": "http.request", "body": piece, "more_body": bool(pieces)}
+            await asyncio.Event().wait()  # never disconnects
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+        await app(scope, receive, send)
+        return status, size
+
+    return fetch
+
+
+async def lifespan(app, event: str, queues: Dict[str, asyncio.Queue]) -> None:
+    """Drive the app's lifespan protocol for one event ('startup' or 'shutdown')."""
+    await queues["in"].put({"type": f"lifespan.{event}"})
+    msg = await queues["out"].get()
+    if msg["type"].endswith(".failed"):
+        raise RuntimeError(f"lifespan {event} failed: {msg.get('message')}")
+
+
+def start_lifespan(app) -> Tuple[asyncio.Task, Dict[str, asyncio.Queue]]:
+    queues: Dict[str, asyncio.Queue] = {"in": asyncio.Queue(), "out": asyncio.Queue()}
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, queues["in"].get, queues["out"].put))
+    return task, queues
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client (GET, and POST with a text body) over asyncio streams."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def fetch(self, req: Req) -> Tuple[int, int]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            return await self._roundtrip(*req)
+        except Exception:
+            await self.close()
+            raise
+
+    async def _roundtrip(self, method: str, path_qs: str, body: bytes) -> Tuple[int, int]:
+        assert self.reader is not None and self.writer is not None
+        head = f"{method} {path_qs} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+        if method != "GET":
+            head += f"Content-Type: text/plain; charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write((head + "\r\n").encode("latin-1"))
+        if body:
+            self.writer.write(body)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+        size = 0
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                n = int((await self.reader.readline()).split(b";")[0], 16)
+                if n == 0:
+                    await self.reader.readline()
+                    break
+                size += len(await self.reader.readexactly(n))
+                await self.reader.readline()
+        else:
+            n = int(headers.get("content-length", "0"))
+            size = len(await self.reader.readexactly(n)) if n else 0
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, size
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+
+# ---------------------------------------------------------------- stats
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    bytes: int = 0
+    sent: int = 0
+
+    def summary(self, wall: float) -> dict:
+        lat = sorted(self.latencies)
+        n = len(lat)
+        return {
+            "requests": n,
+            "errors": self.errors,
+            "error_rate": round(self.errors / n, 4) if n else 0.0,
+            "rps": round(n / wall, 2) if wall > 0 else 0.0,
+            "bytes": self.bytes,
+            "bytes_sent": self.sent,
+            "in_mib_s": round(self.sent / wall / 2 ** 20, 3) if wall > 0 else 0.0,
+            "out_mib_s": round(self.bytes / wall / 2 ** 20, 3) if wall > 0 else 0.0,
+            "p50_ms": _pct(lat, 50),
+            "p95_ms": _pct(lat, 95),
+            "p99_ms": _pct(lat, 99),
+            "max_ms": round(lat[-1] * 1000, 3) if lat else None,
+        }
+
+
+def _pct(sorted_lat: List[float], p: float) -> Optional[float]:
+    if not sorted_lat:
+        return None
+    # Nearest-rank percentile
+    k = min(len(sorted_lat) - 1, max(0, math.ceil(p / 100.0 * len(sorted_lat)) - 1))
+    return round(sorted_lat[k] * 1000, 3)
+
+
+# ---------------------------------------------------------------- runner
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    labels = list(mix)
+    cum_weights = list(itertools.accumulate(mix[k] for k in labels))
+    chars = ZipfChars(warmup_chars(), args.zipf, rng)
+    traffic = Traffic(chars, make_convert_body(chars, args.convert_kib) if "convert" in mix else b"")
+    stats: Dict[str, RouteStats] = {k: RouteStats() for k in labels}
+
+    app = None
+    lifespan_task = None
+    if args.url:
+        u = urlsplit(args.url)
+        host, port = u.hostname or "127.0.0.1", u.port or 80
+        make_fetch = lambda: HttpConnection(host, port)  # noqa: E731
+    else:
+        from server.app import app  # imported late: loading the app is part of the in-process setup
+
+        lifespan_task, queues = start_lifespan(app)
+        await lifespan(app, "startup", queues)
+        shared = asgi_fetcher(app)
+        make_fetch = lambda: None  # noqa: E731
+
+    deadline = time.perf_counter() + args.duration if args.duration > 0 else None
+    budget = itertools.count() if args.requests > 0 else None
+
+    async def worker() -> None:
+        conn = make_fetch()
+        fetch = conn.fetch if conn is not None else shared
+        try:
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if budget is not None and next(budget) >= args.requests:
+                    return
+                label = rng.choices(labels, cum_weights=cum_weights)[0]
+                req = ROUTES[label](traffic, rng)
+                st = stats[label]
+                t0 = time.perf_counter()
+                try:
+                    status, size = await fetch(req)
+                    st.bytes += size
+                    st.sent += len(req[2])
+                    if status >= 400:
+                        st.errors += 1
+                except Exception:
+                    st.errors += 1
+                st.latencies.append(time.perf_counter() - t0)
+        finally:
+            if conn is not None:
+                await conn.close()
+
+    t_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - t_start
+
+    if lifespan_task is not None:
+        await lifespan(app, "shutdown", queues)
+        await lifespan_task
+
+    total = RouteStats()
+    for st in stats.values():
+        total.latencies.extend(st.latencies)
+        total.errors += st.errors
+        total.bytes += st.bytes
+        total.sent += st.sent
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "target": args.url or "in-process",
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "requests": args.requests,
+            "mix": mix,
+            "zipf_s": args.zipf,
+            "seed": args.seed,
+            "chars": len(chars.chars),
+            "convert_kib": args.convert_kib if "convert" in mix else None,
+        },
+        "wall_s": round(wall, 3),
+        "routes": {k: st.summary(wall) for k, st in stats.items()},
+        "total": total.summary(wall),
+    }
+
+
+# ---------------------------------------------------------------- reporting
+
+
+def print_report(result: dict, previous: Optional[dict] = None) -> None:
+    print(f"target={result['target']} wall={result['wall_s']}s config={json.dumps(result['config'], ensure_ascii=False)}")
+    cols = ["requests", "rps", "in_mib_s", "out_mib_s", "error_rate", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print(f"{'route':<8}" + "".join(f"{c:>12}" for c in cols))
+    rows = list(result["routes"].items()) + [("total", result["total"])]
+    for name, s in rows:
+        print(f"{name:<8}" + "".join(f"{_fmt(s.get(c)):>12}" for c in cols))
+        if previous is not None:
+            prev = previous["total"] if name == "total" else previous.get("routes", {}).get(name)
+            if prev:
+                print(f"{'  Δ%':<8}" + "".join(f"{_delta(s.get(c), prev.get(c)):>12}" for c in cols))
+
+
+def _fmt(v) -> str:
+    return "-" if v is None else str(v)
+
+
+def _delta(cur, prev) -> str:
+    if not isinstance(cur, (int, float)) or not isinstance(prev, (int, float)) or prev == 0:
+        return "-"
+    return f"{(cur - prev) / prev * 100:+.1f}"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Load-test the learnCJK.dev server.")
+    ap.add_argument("--url", help="Base URL of a running server (default: drive the app in-process)")
+    ap.add_argument("-c", "--concurrency", type=int, default=16, help="Concurrent clients (default: 16)")
+    ap.add_argument("-d", "--duration", type=float, default=30.0, help="Run time in seconds (default: 30; 0 = use -n)")
+    ap.add_argument("-n", "--requests", type=int, default=0, help="Total requests instead of a duration")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"Route weights (default: {DEFAULT_MIX})")
+    ap.add_argument("--zipf", type=float, default=1.0, help="Zipf exponent over list order (default: 1.0)")
+    ap.add_argument("--convert-kib", type=int, default=256, help="Request body size for the convert route (default: 256)")
+    ap.add_argument("--seed", type=int, default=None, help="Random seed for reproducible traffic")
+    ap.add_argument("--out", help="Result JSON path (default: .loadtest/<timestamp>.json)")
+    ap.add_argument("--compare", help="Previous result JSON to diff against")
+    args = ap.parse_args(argv)
+    if args.duration <= 0 and args.requests <= 0:
+        ap.error("either --duration or --requests must be positive")
+    if args.requests > 0 and args.duration == ap.get_default("duration"):
+        args.duration = 0.0
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            previous = json.load(fh)
+    print_report(result, previous)
+    out = Path(args.out) if args.out else RESULTS_DIR / (result["timestamp"].replace(":", "") + ".json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(result, fh, ensure_ascii=False, indent=2)
+    print(f"saved {os.path.relpath(out, os.getcwd())}")
+    return 1 if result["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+from fastapi.testclient import TestClient
+
+from backend.api import convert
+from server import app as server_app
+
+
+client = TestClient(server_app.app)
+
+
+def test_truncated_tail_completing_a_chunk_is_not_dropped(monkeypatch):
+    # The final decode turns the cut-off 汉 into U+FFFD, the 8th char of a chunk
+    monkeypatch.setattr(server_app, "ChunkSplitter", lambda: convert.ChunkSplitter(8))
+    body = b"abcdefg" + "汉".encode("utf-8")[:2]
+    resp = client.post("/api/convert?source=sc&target=tc", content=body)
+    assert resp.status_code == 200
+    assert resp.text == "abcdefg�"
+
+
+def test_chunked_conversion_matches_whole_text(monkeypatch):
+    monkeypatch.setattr(server_app, "ChunkSplitter", lambda: convert.ChunkSplitter(8))
+    text = "汉字简体，测试转换。" * 20
+    resp = client.post("/api/convert?source=sc&target=tc", content=text.encode("utf-8"))
+    assert resp.status_code == 200
+    assert resp.text == convert.convert_text(text, ("s2t",))
+
+
+def _post_raw(messages, stop_after_chunks=None):
+    """Drive POST /api/convert through ASGI; the client disconnects once `messages` run out.
+
+    With stop_after_chunks, the disconnect waits until that many response chunks arrived.
+    Returns the response body chunks received.
+    """
+    import asyncio
+
+    async def run():
+        received = []
+        got_chunks = asyncio.Event()
+        pending = list(messages)
+
+        async def receive():
+            if pending:
+                return pending.pop(0)
+            if stop_after_chunks is not None:
+                await got_chunks.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                received.append(message["body"])
+                if stop_after_chunks is not None and len(received) >= stop_after_chunks:
+                    got_chunks.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/convert",
+            "raw_path": b"/api/convert",
+            "root_path": "",
+            "query_string": b"source=sc&target=tc",
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        await server_app.app(scope, receive, send)
+        return received
+
+    return asyncio.run(run())
+
+
+def _count_conversions(monkeypatch):
+    calls = []
+
+    def counting(text, steps):
+        calls.append(text)
+        return convert.convert_text(text, steps)
+
+    monkeypatch.setattr(server_app, "ChunkSplitter", lambda: convert.ChunkSplitter(8))
+    monkeypatch.setattr(server_app, "convert_text", counting)
+    return calls
+
+
+def test_disconnect_after_upload_stops_conversion(monkeypatch):
+    calls = _count_conversions(monkeypatch)
+    body = ("汉字简体测试。" * 200).encode("utf-8")
+    received = _post_raw([{"type": "http.request", "body": body, "more_body": False}], stop_after_chunks=2)
+    assert 2 <= len(received) < 10
+    assert len(calls) < 10
+
+
+def test_disconnect_during_upload_ends_quietly():
+    part = ("汉字简体测试。" * 20).encode("utf-8")
+    # Raises if the disconnect escapes as ClientDisconnect after the response started
+    _post_raw([{"type": "http.request", "body": part, "more_body": True}])
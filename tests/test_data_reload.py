@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import char, data
+from server.app import app
+
+
+client = TestClient(app)
+
+PATHS = ("kdef_path", "cjk_learn_path", "lists_path")
+
+
+@pytest.fixture
+def data_files(tmp_path, monkeypatch):
+    """Point the data module at tmp copies of the data files; restore the real ones after."""
+    copies = {}
+    for name in PATHS:
+        src = getattr(data, name)
+        copies[name] = str(tmp_path / os.path.basename(src))
+        shutil.copyfile(src, copies[name])
+        monkeypatch.setattr(data, name, copies[name])
+    data.reload(force=True)
+    yield copies
+    monkeypatch.undo()
+    data.reload(force=True)
+
+
+def _edit_kdef(path, char, definition):
+    with open(path, encoding="utf-8") as fh:
+        kdef = json.load(fh)
+    kdef[char] = {"definition": definition}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(kdef, fh, ensure_ascii=False)
+
+
+def test_valid_change_swaps_version_and_clears_cache(data_files):
+    before = data.current()
+    assert char.get_info("国").unihan_definition != "edited"
+    assert char.cache_info().currsize > 0
+
+    _edit_kdef(data_files["kdef_path"], "国", "edited")
+    assert data.reload() is True
+
+    after = data.current()
+    assert after.version == before.version + 1
+    assert after.tag != before.tag
+    assert char.cache_info().currsize == 0
+    assert char.get_info("国").unihan_definition == "edited"
+    assert data.status()["last_error"] is None
+
+
+def test_invalid_file_keeps_previous_snapshot(data_files):
+    before = data.current()
+    with open(data_files["lists_path"], "w", encoding="utf-8") as fh:
+        fh.write('{"rtk": ')
+    assert data.reload() is False
+    assert data.current() is before
+    assert data.status()["last_error"].startswith("JSONDecodeError")
+    assert client.get("/api/lists", params={"type": "rtk", "field": "chars"}).status_code == 200
+
+
+def test_identical_content_keeps_version(data_files):
+    before = data.current()
+    path = data_files["cjk_learn_path"]
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    with open(path, "wb") as fh:
+        fh.write(raw)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert data.reload() is False
+    assert data.current() is before
+    assert data.status()["last_error"] is None
+
+
+def test_etag_follows_data_version(data_files):
+    params = {"char": "国"}
+    first = client.get("/api/char", params=params)
+    old_tag = first.headers["etag"]
+    assert client.get("/api/char", params=params, headers={"If-None-Match": old_tag}).status_code == 304
+
+    _edit_kdef(data_files["kdef_path"], "国", "edited")
+    assert data.reload() is True
+
+    resp = client.get("/api/char", params=params, headers={"If-None-Match": old_tag})
+    assert resp.status_code == 200
+    assert resp.json()["unihan_definition"] == "edited"
+    new_tag = resp.headers["etag"]
+    assert new_tag != old_tag
+    assert client.get("/api/char", params=params, headers={"If-None-Match": new_tag}).status_code == 304
+
+
+def test_not_modified_only_for_successful_routes(data_files):
+    tag = client.get("/api/char", params={"char": "国"}).headers["etag"]
+    headers = {"If-None-Match": tag}
+    assert client.get("/api/nope", headers=headers).status_code == 404
+    assert client.get("/api/char", headers=headers).status_code == 422
+    assert client.get("/api/variants", params={"char": "abc"}, headers=headers).status_code == 400
+
+
+def test_snapshot_is_frozen_all_the_way_down(data_files):
+    snap = data.current()
+    with pytest.raises(TypeError):
+        snap.lists["rtk"]["fields"]["一"]["keyword"] = "changed"
+    with pytest.raises(TypeError):
+        snap.cjk_learn["一"]["keyword_rtk"] = "changed"
+    chars = client.get("/api/lists", params={"type": "rtk", "field": "chars"}).json()
+    assert chars[:3] == ["一", "二", "三"]
+
+
+def test_result_of_a_replaced_snapshot_is_not_cached(data_files, monkeypatch):
+    char.cache_clear()
+    compute = char._compute_info
+    old = data.current()
+
+    def reload_midway(ch, input_lang, snap):
+        # A reload lands while this lookup still works on the old snapshot
+        _edit_kdef(data_files["kdef_path"], "国", "edited")
+        assert data.reload() is True
+        return compute(ch, input_lang, snap)
+
+    monkeypatch.setattr(char, "_compute_info", reload_midway)
+    assert char.get_info("国").unihan_definition != "edited"
+    monkeypatch.setattr(char, "_compute_info", compute)
+
+    assert data.current() is not old
+    assert char.cache_info().currsize == 0
+    assert char.get_info("国").unihan_definition == "edited"
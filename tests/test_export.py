@@ -0,0 +1,64 @@
+import csv
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import data
+from backend.api.char import get_info
+from server.app import app
+
+
+client = TestClient(app)
+
+
+def _chars(type):
+    return list(data.current().lists[type]["chars"])
+
+
+def test_csv_range_has_header_and_rows():
+    resp = client.get("/api/export", params={"type": "rtk", "start": 2, "end": 4})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(resp.text)))
+    assert rows[0] == ["char", "index", "keyword", "definition", "simplified", "traditional", "japanese"]
+    assert [r[0] for r in rows[1:]] == _chars("rtk")[1:4]
+    assert rows[1][1:3] == ["2", "two"]
+
+
+def test_anki_headers():
+    resp = client.get("/api/export", params={"type": "rtk", "format": "anki", "end": 3})
+    assert resp.status_code == 200
+    lines = resp.text.split("\n")
+    assert lines[:2] == ["#separator:tab", "#html:false"]
+    assert lines[2] == "#columns:" + "\t".join(
+        ["char", "index", "keyword", "definition", "simplified", "traditional", "japanese", "tags"]
+    )
+    assert lines[3] == "#tags column:8"
+    assert [l.split("\t")[0] for l in lines[4:7]] == _chars("rtk")[:3]
+    assert all(l.endswith("\tlearnCJK::rtk") for l in lines[4:7])
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"type": "rtk", "start": 0},
+        {"type": "rtk", "start": 5, "end": 4},
+        {"type": "rtk", "start": 3001},
+        {"type": "rtk", "format": "xml"},
+        {"type": "nope"},
+    ],
+)
+def test_invalid_arguments_are_rejected(params):
+    assert client.get("/api/export", params=params).status_code == 400
+
+
+def test_forms_match_get_info():
+    # Forms come from get_forms_batch's per-batch conversion memo, not get_info
+    resp = client.get("/api/export", params={"type": "rtk", "end": 300})
+    assert resp.status_code == 200
+    rows = list(csv.reader(io.StringIO(resp.text)))[1:]
+    assert any(r[-3] != r[-2] for r in rows)
+    for row in rows:
+        info = get_info(row[0])
+        assert row[-3:] == [info.simplified.char, info.traditional.char, info.japanese.char], row[0]
@@ -0,0 +1,17 @@
+from fastapi.testclient import TestClient
+
+from server.app import app
+
+
+client = TestClient(app)
+
+
+def test_single_character_returns_its_cluster():
+    resp = client.get("/api/variants", params={"char": "国"})
+    assert resp.status_code == 200
+    assert "國" in [m["char"] for m in resp.json()["members"]]
+
+
+def test_multi_character_query_is_rejected():
+    resp = client.get("/api/variants", params={"char": "abc"})
+    assert resp.status_code == 400